@@ -48,6 +48,13 @@ def main(argv):
         dest="link_entities",
         action="store_false",
     )
+    parser.add_argument(
+        "--context-rules",
+        help="Rule file listing words which, when found near something that "
+        + "looks like a reference, mean it isn't one. Defaults to "
+        + "context_rules.txt next to this script or executable if present, "
+        + "otherwise the built-in rules.",
+    )
     parser.add_argument(
         "--maps-only",
         help=argparse.SUPPRESS,
@@ -60,6 +67,12 @@ def main(argv):
     global VERBOSE
     VERBOSE = args.verbose
 
+    # Load the rules before doing anything slow, so that mistakes in the rule
+    # file are reported straight away.
+    context_rules = None
+    if not args.maps_only and not args.print_link_targets:
+        context_rules = load_context_rules(args.context_rules)
+
     doc = fitz.open(args.input_filename)
 
     link_targets = get_link_targets(doc, args.link_entities)
@@ -83,7 +96,7 @@ def main(argv):
             if not args.verbose:
                 print(f"\rAdding links to page {page.number + 1}", end="")
             for word, rect, target_page in find_references(
-                page, link_targets, args.link_entities
+                page, link_targets, args.link_entities, context_rules
             ):
                 add_link(page, word, rect, target_page)
                 links_added += 1
@@ -260,7 +273,7 @@ def get_link_targets(doc, link_entities):
 DIE_RANGES_EXCLUDED = 0
 
 
-def find_references(page, link_targets, link_entities):
+def find_references(page, link_targets, link_entities, context_rules):
     # Delimiters are carefully chosen to only capture cases where we want to
     # add links.
     # * We omit ":", because the section headers have colons after the name
@@ -287,6 +300,8 @@ def find_references(page, link_targets, link_entities):
         else:
             words.append((word, [(x0, y0, x1, y1)]))
 
+    canon_words = [canon(word) for (word, _) in words]
+
     die_ranges = []
     links = []
     for i in range(len(words)):
@@ -297,11 +312,7 @@ def find_references(page, link_targets, link_entities):
             die_ranges.append((*r, centre(*rects[0])))
 
         if target_page := link_targets.get(word):
-            before, after = (
-                words[i - 1][0] if i > 0 else None,
-                words[i + 1][0] if i < len(words) - 1 else None,
-            )
-            if non_ref_pattern(before, after):
+            if excluded_by_context(canon_words, i, context_rules):
                 continue
             for rect in rects:
                 links.append((word, fitz.Rect(*rect), target_page))
@@ -409,63 +420,83 @@ def find_table_entries(die_ranges):
     return excluded_points
 
 
-def non_ref_pattern(before, after):
-    prefixes = {"on", "level", "levels", "dmg", "damage"}
-    suffixes = {
-        "levels",
-        "dmg",
-        "damage",
-        "dagger",
-        "flail",
-        "mace",
-        "crossbow",
-        "club",
-        "hammer",
-        "war",
-        "hp",
-        "health",
-        "cp",
-        "sp",
-        "gp",
-        "pp",
-        "silver",
-        "gold",
-        "platinum",
-        "gems",
-        "scrolls",
-        "keys",
-        "magic",
-        "curios",
-        "specimens",
-        "spells",
-        "objects",
-        "rounds",
-        "turns",
-        "hours",
-        "days",
-        "weeks",
-        "months",
-        "years",
-        "light",
-        "large",
-        "short",
-        "long",
-        "normal",
-        "lesser",
-        "male",
-        "female",
-        "skilled",
-        "unskilled",
-        "classed",
-        "nonclassed",
-        "guildsmen",
-        "poor",
-        "groups",
-    }
-    if before and canon(before) in prefixes:
-        return True
-    if after and canon(after) in suffixes:
-        return True
+# Used when there's no context_rules.txt to load, e.g. when running a
+# standalone executable which was distributed without it. Keep this in sync
+# with context_rules.txt.
+DEFAULT_CONTEXT_RULES = """
+[-1]
+on level levels dmg damage
+
+[1]
+levels dmg damage
+dagger flail mace crossbow club hammer war
+hp health
+cp sp gp pp silver gold platinum gems scrolls keys magic curios specimens
+spells objects
+rounds turns hours days weeks months years
+light large short long normal lesser male female skilled unskilled classed
+nonclassed guildsmen poor groups
+"""
+
+
+def default_context_rules_filename():
+    # When frozen into an executable (e.g. by PyInstaller), __file__ points
+    # into a temporary directory, so we look next to the executable instead.
+    # That's somewhere users can actually find and edit the file.
+    if getattr(sys, "frozen", False):
+        return Path(sys.executable).parent / "context_rules.txt"
+    return Path(__file__).parent / "context_rules.txt"
+
+
+def load_context_rules(filename):
+    if filename is None:
+        filename = default_context_rules_filename()
+        if not filename.exists():
+            vprint("Using built-in context rules")
+            return parse_context_rules(DEFAULT_CONTEXT_RULES, "<built-in>")
+    try:
+        text = Path(filename).read_text(encoding="utf-8")
+    except OSError as e:
+        exit(f"Couldn't read context rules from {filename}: {e}")
+    vprint(f"Loading context rules from {filename}")
+    return parse_context_rules(text, filename)
+
+
+def parse_context_rules(text, source):
+    # The rules are a list of sections, each headed by a word offset relative
+    # to the candidate reference (e.g. "[-1]" for the word before), followed
+    # by the words that rule the candidate out at that offset. See
+    # context_rules.txt for details.
+    #
+    # We compile this down to a tuple of (offset, words) pairs, so that
+    # checking a candidate is just a handful of set lookups.
+    rules = defaultdict(set)
+    offset = None
+    for line_num, line in enumerate(text.splitlines(), start=1):
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        if m := re.fullmatch(r"\[\s*([+-]?\d+)\s*\]", line):
+            offset = int(m.group(1))
+            if offset == 0:
+                exit(f"{source}:{line_num}: Offset must be non-zero")
+            continue
+        for raw_word in line.split():
+            if offset is None:
+                exit(f"{source}:{line_num}: Word '{raw_word}' is not under an offset")
+            if not (word := canon(raw_word)):
+                exit(f"{source}:{line_num}: '{raw_word}' contains no letters")
+            rules[offset].add(word)
+
+    vprint(f"Loaded {sum(map(len, rules.values()))} context rules")
+    return tuple((offset, frozenset(words)) for offset, words in sorted(rules.items()))
+
+
+def excluded_by_context(canon_words, i, context_rules):
+    for offset, excluded_words in context_rules:
+        j = i + offset
+        if 0 <= j < len(canon_words) and canon_words[j] in excluded_words:
+            return True
     return False
 
 